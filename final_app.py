@@ -2,6 +2,8 @@ import streamlit as st
 import chromadb
 from transformers import pipeline, AutoTokenizer, AutoModel
 from pathlib import Path
+import logging
+import os
 import tempfile
 from datetime import datetime
 import torch
@@ -12,6 +14,7 @@ from docling.backend.docling_parse_v2_backend import DoclingParseV2DocumentBacke
 from docling.datamodel.base_models import InputFormat
 from docling.datamodel.pipeline_options import PdfPipelineOptions, AcceleratorOptions, AcceleratorDevice
 from utils_img import get_base64_of_local_image
+from index_snapshot import bootstrap_from_snapshot
 
 def get_chroma_client():
     # Use new ChromaDB PersistentClient API (DuckDB/Parquet, local storage)
@@ -29,6 +32,22 @@ def reset_database():
 
 client = get_chroma_client()
 collection = client.get_or_create_collection("docs")
+
+# New replicas bulk-load a pre-built snapshot instead of re-embedding the corpus.
+# cache_resource runs this once per process, not on every rerun of every session.
+# A bad snapshot is reported once and the app keeps serving the local collection.
+@st.cache_resource
+def load_index_snapshot(path):
+    """Returns (records loaded, error message or None)"""
+    try:
+        return bootstrap_from_snapshot(collection, path), None
+    except Exception as e:
+        logging.getLogger(__name__).exception("Loading index snapshot %s failed", path)
+        return 0, f"Could not load index snapshot {path}: {e}"
+
+snapshot_loaded, snapshot_error = load_index_snapshot(
+    os.environ.get("INDEX_SNAPSHOT", "index_snapshot.bin")
+)
 tokenizer = AutoTokenizer.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
 model = AutoModel.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
 qa_pipeline = pipeline("text2text-generation", model="google/flan-t5-small")
@@ -40,6 +59,21 @@ def embed_text(text):
     embedding = outputs.last_hidden_state.mean(dim=1).numpy()[0]
     return embedding.tolist()
 
+def retrieve_context(question):
+    """Return (id, document) of the best match for question, or None"""
+    results = collection.query(
+        query_texts=[question],
+        n_results=1
+    )
+    if results["documents"] and results["documents"][0]:
+        return results["ids"][0][0], results["documents"][0][0]
+    return None
+
+def answer_question(question, context):
+    """Generate an answer to question from the retrieved context"""
+    prompt = f"Context: {context}\n\nQuestion: {question}\n\nAnswer:"
+    return qa_pipeline(prompt, max_length=150)[0]['generated_text'].strip()
+
 def convert_to_markdown(file_path: str) -> str:
     path = Path(file_path)
     ext = path.suffix.lower()
@@ -245,6 +279,8 @@ def main():
     add_custom_css()
     st.markdown('<h1 class="main-header">🌍✈️ Travel, Cultures & Food Knowledge Hub 🍜🍕🥑🍣</h1>', unsafe_allow_html=True)
     st.markdown('<div class="main-header-spacer"></div>', unsafe_allow_html=True)
+    if snapshot_error:
+        st.error(f"❌ {snapshot_error}")
     st.markdown("""
     <div style='text-align:center; font-size:1.2rem; margin-bottom:1.5rem;'>
         Welcome!<br>
@@ -317,21 +353,18 @@ def main():
                 st.warning("Please select files to upload first.")
     with tab2:
         st.header("Ask Questions About Travel, Cultures, and Food")
-        if st.session_state.converted_docs:
+        # Documents may come from this session's uploads or from a bootstrapped snapshot
+        if collection.count() > 0:
             question, search_button, clear_button = enhanced_question_interface()
             if search_button and question:
-                results = collection.query(
-                    query_texts=[question],
-                    n_results=1
-                )
-                if results["documents"]:
-                    context = results["documents"][0][0]
-                    prompt = f"Context: {context}\n\nQuestion: {question}\n\nAnswer:"
-                    answer = qa_pipeline(prompt, max_length=150)[0]['generated_text'].strip()
+                match = retrieve_context(question)
+                if match is not None:
+                    source, context = match
+                    answer = answer_question(question, context)
                     st.markdown("### 💡 Answer")
                     st.write(answer)
-                    st.info(f"📄 Source: {st.session_state.converted_docs[0]['filename']}")
-                    add_to_search_history(question, answer, st.session_state.converted_docs[0]['filename'])
+                    st.info(f"📄 Source: {source}")
+                    add_to_search_history(question, answer, source)
                 else:
                     st.write("No answer found.")
             if clear_button:
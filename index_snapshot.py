@@ -0,0 +1,271 @@
+"""
+Export / import the ChromaDB "docs" collection as a single snapshot file.
+
+A new replica can bulk-load the snapshot at startup instead of running
+embed_text over the whole corpus again.
+
+File layout:
+    MAGIC (8 bytes) | header length (uint64, little endian) | JSON header
+    | padding to 64 bytes | embeddings block | scales block (int8 only)
+
+The header holds ids, documents, metadatas, dtype and shape. The embeddings
+block is raw little-endian data, so it can be opened with numpy.memmap
+without reading the whole file into memory.
+
+Usage:
+    python index_snapshot.py export index_snapshot.bin --dtype float16
+    python index_snapshot.py import index_snapshot.bin
+"""
+import argparse
+import json
+import struct
+import sys
+from pathlib import Path
+
+import chromadb
+import numpy as np
+
+MAGIC = b"CHROMSN1"
+ALIGN = 64
+DTYPES = ("float32", "float16", "int8")
+PAGE_SIZE = 1000
+BATCH_SIZE = 1000
+
+
+def get_chroma_client(path=".chromadb"):
+    return chromadb.PersistentClient(path=path)
+
+
+def _align(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _quantize(embeddings: np.ndarray, dtype: str):
+    """Convert float32 embeddings to the stored dtype, returning (data, scales)"""
+    if dtype == "float32":
+        return embeddings.astype("<f4"), None
+    if dtype == "float16":
+        return embeddings.astype("<f2"), None
+    if embeddings.size == 0:
+        return embeddings.astype("i1"), np.zeros(len(embeddings), dtype="<f4")
+    # Symmetric per-vector int8: value = q * scale
+    scales = np.abs(embeddings).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    data = np.clip(np.rint(embeddings / scales[:, None]), -127, 127).astype("i1")
+    return data, scales.astype("<f4")
+
+
+def _fetch_all(collection):
+    """Read the whole collection page by page"""
+    ids, documents, metadatas, embeddings = [], [], [], []
+    offset = 0
+    while True:
+        page = collection.get(
+            include=["documents", "metadatas", "embeddings"],
+            limit=PAGE_SIZE,
+            offset=offset
+        )
+        if not page["ids"]:
+            break
+        ids.extend(page["ids"])
+        documents.extend(page["documents"])
+        metadatas.extend(page["metadatas"])
+        embeddings.extend(page["embeddings"])
+        offset += len(page["ids"])
+    return ids, documents, metadatas, embeddings
+
+
+def export_snapshot(collection, out_path: str, dtype: str = "float32") -> int:
+    """Write the collection to out_path, returns the number of records"""
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported dtype: {dtype}")
+
+    ids, documents, metadatas, embeddings = _fetch_all(collection)
+    if ids:
+        matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+    else:
+        matrix = np.zeros((0, 0), dtype=np.float32)
+    data, scales = _quantize(matrix, dtype)
+
+    header = json.dumps({
+        "collection": collection.name,
+        "dtype": dtype,
+        "shape": list(data.shape),
+        "ids": ids,
+        "documents": documents,
+        "metadatas": metadatas,
+    }).encode("utf-8")
+    data_offset = _align(len(MAGIC) + 8 + len(header))
+
+    # Write to a temp file first so a crash never leaves a half-written snapshot
+    out = Path(out_path)
+    tmp = out.with_name(out.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        f.write(b"\0" * (data_offset - f.tell()))
+        f.write(data.tobytes())
+        if scales is not None:
+            f.write(scales.tobytes())
+    tmp.replace(out)
+    return len(ids)
+
+
+def read_snapshot(path: str):
+    """Open a snapshot, returns (header, embeddings, scales) with arrays memory-mapped"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path}: not an index snapshot")
+        raw_len = f.read(8)
+        if len(raw_len) != 8:
+            raise ValueError(f"{path}: truncated snapshot header")
+        (header_len,) = struct.unpack("<Q", raw_len)
+        raw_header = f.read(header_len)
+        if len(raw_header) != header_len:
+            raise ValueError(f"{path}: truncated snapshot header")
+    try:
+        header = json.loads(raw_header.decode("utf-8"))
+        rows, dim = header["shape"]
+        stored = {"float32": "<f4", "float16": "<f2", "int8": "i1"}[header["dtype"]]
+        if not len(header["ids"]) == len(header["documents"]) == len(header["metadatas"]) == rows:
+            raise ValueError("record count does not match shape")
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"{path}: malformed snapshot header ({e})") from e
+
+    data_offset = _align(len(MAGIC) + 8 + header_len)
+    if rows == 0:
+        return header, np.zeros((0, dim), dtype=np.float32), None
+
+    expected = data_offset + rows * dim * np.dtype(stored).itemsize
+    if header["dtype"] == "int8":
+        expected += rows * 4
+    if Path(path).stat().st_size < expected:
+        raise ValueError(f"{path}: truncated snapshot data")
+    data = np.memmap(path, dtype=stored, mode="r", offset=data_offset, shape=(rows, dim))
+    if header["dtype"] == "int8":
+        scales = np.memmap(
+            path, dtype="<f4", mode="r",
+            offset=data_offset + data.nbytes, shape=(rows,)
+        )
+        return header, data, scales
+    return header, data, None
+
+
+def _check_compatible(collection, header, path: str):
+    """Refuse snapshots taken from another collection or embedding model"""
+    if header["collection"] != collection.name:
+        raise ValueError(
+            f"{path}: snapshot is for collection {header['collection']!r}, not {collection.name!r}"
+        )
+    rows, dim = header["shape"]
+    if rows == 0:
+        # An empty export has no embedding dimension to compare
+        return
+    existing = collection.get(limit=1, include=["embeddings"])["embeddings"]
+    if existing is not None and len(existing) > 0:
+        if len(existing[0]) != dim:
+            raise ValueError(
+                f"{path}: snapshot embeddings have dimension {dim}, "
+                f"collection has {len(existing[0])}"
+            )
+
+
+def _missing_ids(collection, ids):
+    """Return the ids that are not in collection"""
+    missing = []
+    for start in range(0, len(ids), PAGE_SIZE):
+        batch = ids[start:start + PAGE_SIZE]
+        found = set(collection.get(ids=batch, include=[])["ids"])
+        missing.extend(i for i in batch if i not in found)
+    return missing
+
+
+def import_snapshot(collection, path: str) -> int:
+    """Bulk-load a snapshot into collection, returns the number of records"""
+    header, data, scales = read_snapshot(path)
+    _check_compatible(collection, header, path)
+    return _upsert_rows(collection, header, data, scales, range(len(header["ids"])))
+
+
+def _upsert_rows(collection, header, data, scales, rows) -> int:
+    """Upsert the snapshot records at the given row positions, returns how many"""
+    rows = np.asarray(rows, dtype=np.int64)
+    ids = header["ids"]
+    documents = header["documents"]
+    metadatas = header["metadatas"]
+
+    for start in range(0, len(rows), BATCH_SIZE):
+        idx = rows[start:start + BATCH_SIZE]
+        # Only this batch is dequantized, the rest stays on disk
+        batch = np.asarray(data[idx], dtype=np.float32)
+        if scales is not None:
+            batch = batch * np.asarray(scales[idx])[:, None]
+        records = {
+            "ids": [ids[i] for i in idx],
+            "documents": [documents[i] for i in idx],
+            "embeddings": batch.tolist(),
+        }
+        batch_meta = [metadatas[i] for i in idx]
+        # ChromaDB rejects None/empty metadata entries, so only pass them when all are set
+        if all(batch_meta):
+            records["metadatas"] = batch_meta
+        elif any(batch_meta):
+            _upsert_mixed(collection, records, batch_meta)
+            continue
+        collection.upsert(**records)
+    return len(rows)
+
+
+def _upsert_mixed(collection, records, batch_meta):
+    """Upsert a batch where only some records have metadata"""
+    with_meta = [i for i, m in enumerate(batch_meta) if m]
+    without_meta = [i for i, m in enumerate(batch_meta) if not m]
+    for idx, meta in ((with_meta, True), (without_meta, False)):
+        if not idx:
+            continue
+        part = {key: [values[i] for i in idx] for key, values in records.items()}
+        if meta:
+            part["metadatas"] = [batch_meta[i] for i in idx]
+        collection.upsert(**part)
+
+
+def bootstrap_from_snapshot(collection, path: str) -> int:
+    """Load the snapshot records that are missing from collection, returns how many"""
+    if not Path(path).is_file():
+        return 0
+    header, data, scales = read_snapshot(path)
+    _check_compatible(collection, header, path)
+    # A count() check would accept a partial import left by a crashed start,
+    # so look for the snapshot's ids instead. Only missing records are loaded,
+    # so records this replica has since replaced keep their newer version.
+    missing = set(_missing_ids(collection, header["ids"]))
+    if not missing:
+        return 0
+    rows = [i for i, record_id in enumerate(header["ids"]) if record_id in missing]
+    return _upsert_rows(collection, header, data, scales, rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export/import the vector index snapshot")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("file", help="Snapshot file path")
+    parser.add_argument("--db", default=".chromadb", help="ChromaDB directory")
+    parser.add_argument("--collection", default="docs")
+    parser.add_argument("--dtype", default="float32", choices=DTYPES,
+                        help="Embedding precision for export")
+    args = parser.parse_args(argv)
+
+    client = get_chroma_client(args.db)
+    collection = client.get_or_create_collection(args.collection)
+    if args.command == "export":
+        count = export_snapshot(collection, args.file, args.dtype)
+        print(f"Exported {count} records to {args.file} ({args.dtype})")
+    else:
+        count = import_snapshot(collection, args.file)
+        print(f"Imported {count} records from {args.file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+"""
+Load generator for final_app.py.
+
+Simulates many concurrent Streamlit sessions on one node. Streamlit runs every
+session as a thread in the same process, so each simulated session is a thread.
+
+Streamlit also re-runs final_app.py on every interaction, and final_app loads
+its models at module level without st.cache_resource. So in production each
+search pays for from_pretrained as well. The retrieve and answer modes import
+final_app once and leave that cost out, which overstates capacity; use rerun
+or apptest for numbers that include it.
+
+Modes:
+    retrieve  - only retrieve_context (ChromaDB query), models loaded once
+    answer    - retrieve_context + answer_question (query + flan-t5), models loaded once
+    rerun     - execute final_app.py in-process, then search, like one rerun
+    apptest   - full script run per question through streamlit's AppTest
+                stand-in client (no browser, no websocket). Single session only:
+                AppTest swaps process-wide Streamlit state (Runtime instance,
+                st.secrets) while it runs, so concurrent AppTests interfere with
+                each other. For concurrency, load a running `streamlit run` server.
+
+Reports throughput, latency percentiles, peak RSS, and how often calls to the
+shared collection / QA pipeline overlap. With --serialize the harness wraps
+them in its own lock and reports the wait for it; final_app has no such lock.
+
+Usage:
+    python loadtest.py --sessions 8 --requests 20 --mode answer
+    python loadtest.py --sessions 4 --duration 60 --questions questions.txt --serialize
+"""
+import argparse
+import math
+import random
+import resource
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+DEFAULT_QUESTIONS = [
+    "What are the most famous dishes in Japan?",
+    "Describe unique cultural traditions in Montenegro.",
+    "What landmarks should I visit in Brazil?",
+    "Compare the food culture between Italy and Mexico.",
+    "What festivals are celebrated in India?",
+    "How can I travel more sustainably?",
+]
+
+
+class InstrumentedResource:
+    """Proxy around a shared object that tracks overlapping callers
+
+    With serialize=True the harness adds its own lock around the object and
+    records how long callers wait for it. final_app has no such lock; this
+    shows what serializing access would cost.
+    """
+
+    def __init__(self, name, target, serialize=False):
+        self._name = name
+        self._target = target
+        self._lock = threading.Lock() if serialize else None
+        self._stats_lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+        self.overlapping_calls = 0
+        self.wait_times = []
+
+    def _enter(self):
+        with self._stats_lock:
+            self.calls += 1
+            if self.in_flight > 0:
+                self.overlapping_calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _exit(self):
+        with self._stats_lock:
+            self.in_flight -= 1
+
+    def _call(self, func, *args, **kwargs):
+        self._enter()
+        try:
+            if self._lock is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            with self._lock:
+                wait = time.perf_counter() - start
+                with self._stats_lock:
+                    self.wait_times.append(wait)
+                return func(*args, **kwargs)
+        finally:
+            self._exit()
+
+    def __call__(self, *args, **kwargs):
+        return self._call(self._target, *args, **kwargs)
+
+    def __getattr__(self, attr):
+        value = getattr(self._target, attr)
+        if callable(value):
+            return lambda *args, **kwargs: self._call(value, *args, **kwargs)
+        return value
+
+    def report(self):
+        lines = [
+            f"  {self._name}: calls={self.calls} "
+            f"overlapping={self.overlapping_calls} ({_ratio(self.overlapping_calls, self.calls)}) "
+            f"max_in_flight={self.max_in_flight}"
+        ]
+        if self.wait_times:
+            waits = sorted(self.wait_times)
+            lines.append(
+                f"    harness lock wait: total={sum(waits):.3f}s "
+                f"p50={percentile(waits, 50) * 1000:.1f}ms "
+                f"p99={percentile(waits, 99) * 1000:.1f}ms"
+            )
+        return "\n".join(lines)
+
+
+def _ratio(part, whole):
+    return f"{part / whole:.0%}" if whole else "n/a"
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def load_questions(path):
+    if path is None:
+        return DEFAULT_QUESTIONS
+    questions = [line.strip() for line in Path(path).read_text(encoding="utf-8").splitlines()]
+    questions = [q for q in questions if q and not q.startswith("#")]
+    if not questions:
+        raise ValueError(f"{path}: no questions found")
+    return questions
+
+
+def make_direct_runner(mode, serialize):
+    """Patch final_app's shared objects with instrumented proxies and return a runner
+
+    A runner takes a question and returns the timed latency in seconds.
+    """
+    import final_app
+
+    resources = [
+        InstrumentedResource("collection", final_app.collection, serialize),
+        InstrumentedResource("qa_pipeline", final_app.qa_pipeline, serialize),
+    ]
+    final_app.collection, final_app.qa_pipeline = resources
+
+    def run(question):
+        start = time.perf_counter()
+        match = final_app.retrieve_context(question)
+        if mode == "answer" and match is not None:
+            final_app.answer_question(question, match[1])
+        return time.perf_counter() - start
+
+    return run, resources
+
+
+def make_rerun_runner():
+    """Execute the script top level (model loading included) and then search"""
+    import runpy
+
+    script = str(Path(__file__).with_name("final_app.py"))
+
+    def run(question):
+        start = time.perf_counter()
+        # Any run_name other than "__main__" skips main(), i.e. the widgets
+        app = runpy.run_path(script, run_name="__loadtest__")
+        match = app["retrieve_context"](question)
+        if match is not None:
+            app["answer_question"](question, match[1])
+        return time.perf_counter() - start
+
+    return run, []
+
+
+def make_apptest_runner(timeout):
+    """Drive the whole script through streamlit's AppTest client, one session at a time"""
+    from streamlit.testing.v1 import AppTest
+
+    script = str(Path(__file__).with_name("final_app.py"))
+
+    def run(question):
+        # The first run only renders the widgets; time just the search rerun
+        at = AppTest.from_file(script, default_timeout=timeout)
+        at.run()
+        at.text_input[0].input(question)
+        next(b for b in at.button if b.label == "🔍 Search Documents").click()
+        start = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - start
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        return elapsed
+
+    return run, []
+
+
+def session_worker(run, questions, weights, deadline, requests, seed, results):
+    """Ask questions until done, recording into this worker's own results dict"""
+    rng = random.Random(seed)
+    done = 0
+    while (requests is None or done < requests) and (deadline is None or time.perf_counter() < deadline):
+        question = rng.choices(questions, weights=weights)[0]
+        try:
+            results["latencies"].append(run(question))
+        except Exception as e:
+            results["errors"][type(e).__name__] += 1
+        done += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent sessions against final_app.py")
+    parser.add_argument("--sessions", type=int,
+                        help="Concurrent sessions (threads), default 4 (1 for apptest)")
+    parser.add_argument("--requests", type=int, default=10, help="Questions per session")
+    parser.add_argument("--duration", type=float, help="Run for N seconds instead of a fixed request count")
+    parser.add_argument("--mode", default="answer", choices=["retrieve", "answer", "rerun", "apptest"])
+    parser.add_argument("--questions", help="File with one question per line (default: built-in mix)")
+    parser.add_argument("--weights", help="Comma separated weights matching the questions")
+    parser.add_argument("--serialize", action="store_true",
+                        help="Wrap shared objects in a harness-added lock (not one in final_app) "
+                             "and report wait time for it")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed questions before the run")
+    parser.add_argument("--timeout", type=float, default=120, help="AppTest run timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    questions = load_questions(args.questions)
+    weights = None
+    if args.weights:
+        weights = [float(w) for w in args.weights.split(",")]
+        if len(weights) != len(questions):
+            parser.error("--weights must have one value per question")
+
+    if args.serialize and args.mode in ("rerun", "apptest"):
+        parser.error(f"--serialize is not supported with --mode {args.mode}")
+    if args.sessions is None:
+        args.sessions = 1 if args.mode == "apptest" else 4
+    if args.mode == "apptest" and args.sessions != 1:
+        # AppTest swaps process-wide Streamlit state, so concurrent runs clobber each other
+        parser.error("--mode apptest only supports --sessions 1")
+    if args.mode == "apptest":
+        run, resources = make_apptest_runner(args.timeout)
+    elif args.mode == "rerun":
+        run, resources = make_rerun_runner()
+    else:
+        run, resources = make_direct_runner(args.mode, args.serialize)
+
+    # Warm-up keeps one-off costs (imports, model downloads) out of the numbers
+    for question in questions[:args.warmup]:
+        run(question)
+    for res in resources:
+        res.calls = res.overlapping_calls = res.max_in_flight = 0
+        res.wait_times = []
+
+    # One results dict per worker, merged after join, so threads never share counters
+    worker_results = [
+        {"latencies": [], "errors": defaultdict(int)} for _ in range(args.sessions)
+    ]
+    requests = None if args.duration else args.requests
+    start = time.perf_counter()
+    deadline = start + args.duration if args.duration else None
+    threads = [
+        threading.Thread(
+            target=session_worker,
+            args=(run, questions, weights, deadline, requests, args.seed + i, worker_results[i]),
+            daemon=True
+        )
+        for i in range(args.sessions)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(lat for r in worker_results for lat in r["latencies"])
+    error_counts = defaultdict(int)
+    for r in worker_results:
+        for name, count in r["errors"].items():
+            error_counts[name] += count
+    errors = sum(error_counts.values())
+    print(f"mode={args.mode} sessions={args.sessions} elapsed={elapsed:.2f}s")
+    print(f"completed={len(latencies)} errors={errors} throughput={len(latencies) / elapsed:.2f} req/s")
+    if latencies:
+        print(
+            "latency ms: "
+            + " ".join(f"p{p}={percentile(latencies, p) * 1000:.1f}" for p in (50, 90, 95, 99))
+            + f" max={latencies[-1] * 1000:.1f}"
+        )
+    for name, count in error_counts.items():
+        print(f"  error {name}: {count}")
+    print(f"peak RSS: {peak_rss_mb():.1f} MB")
+    if args.mode in ("retrieve", "answer"):
+        print(
+            "note: models were loaded once; in production final_app reloads them on "
+            "every rerun, so these numbers overstate capacity (see --mode rerun)"
+        )
+    if resources:
+        print("shared resources (overlapping = started while another call was in flight):")
+        for res in resources:
+            if res.calls:
+                print(res.report())
+        if args.serialize:
+            print("  lock wait is for a lock added by --serialize, not one in final_app")
+    else:
+        print(f"shared resources: no overlap data for --mode {args.mode}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())